@@ -1,69 +1,344 @@
 import os
+
+# One BLAS/OpenMP thread per process: single-row predictions gain nothing from BLAS threads,
+# and N server workers each spawning a thread per core oversubscribe the CPU.
+# Must run before numpy (or anything importing it) is loaded.
+for _var in ("OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "OMP_NUM_THREADS"):
+    os.environ.setdefault(_var, "1")
+
+import functools
 import logging
+import queue
 import threading
-from typing import Optional
-from flask import Flask, request, jsonify, render_template_string
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+import orjson
+from flask import Flask, Response, request
+
+from artifact_paths import MODEL_PATH, MODEL_JOBLIB_PATH, VECTORIZER_PATH, VECTORIZER_JOBLIB_PATH
+
+try:
+    import numba
+except ImportError:  # optional; the fused predict path falls back to SciPy's matvec
+    numba = None
+
+try:
+    import re2
+except ImportError:  # optional; tokenization falls back to the vectorizer's own regex
+    re2 = None
+
+# CountVectorizer's default token_pattern is a maximal run of 2+ word characters, which RE2
+# (whose \w and \b are ASCII-only) expresses with Unicode classes instead
+_DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+_RE2_TOKEN_RE = re2.compile(r"[\pL\pN_]{2,}") if re2 is not None else None
 
 # Flask app (Elastic Beanstalk Procfile expects "application:application")
 application = Flask(__name__)
 
-# Logging
-logging.basicConfig(level=logging.INFO)
+# Logging (WARNING by default so library chatter stays off the request path; LOGLEVEL=INFO/DEBUG to debug)
+_log_level = os.getenv("LOGLEVEL", "WARNING").upper()
+_log_level_valid = isinstance(logging.getLevelName(_log_level), int)
+logging.basicConfig(level=_log_level if _log_level_valid else logging.WARNING)
 logger = logging.getLogger(__name__)
+if not _log_level_valid:
+    # A typo must not stop workers from booting
+    logger.warning("Unknown LOGLEVEL %r; using WARNING.", _log_level)
 
-# Resolve artifact paths relative to this file; allow env overrides (empty env won't override)
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_PATH = os.getenv("MODEL_PATH") or os.path.join(BASE_DIR, "basic_classifier.pkl")
-VECTORIZER_PATH = os.getenv("VECTORIZER_PATH") or os.path.join(BASE_DIR, "count_vectorizer.pkl")
 
 # Log resolved paths
-logger.info("CWD: %s", os.getcwd())
-logger.info("Resolved MODEL_PATH: %s", MODEL_PATH)
-logger.info("Resolved VECTORIZER_PATH: %s", VECTORIZER_PATH)
-
-# Global variables for loaded artifacts
-_loaded_model: Optional[object] = None
-_vectorizer: Optional[object] = None
-_artifact_lock = threading.Lock()
+if logger.isEnabledFor(logging.INFO):
+    logger.info("CWD: %s", os.getcwd())
+    logger.info("Resolved MODEL_PATH: %s", MODEL_PATH)
+    logger.info("Resolved VECTORIZER_PATH: %s", VECTORIZER_PATH)
 
 # Artifact loading
-def _load_artifacts_once() -> None:
-    """Lazily load model and vectorizer once per process."""
-    global _loaded_model, _vectorizer
-    if _loaded_model is not None and _vectorizer is not None:
+class _Artifacts(NamedTuple):
+    model: object
+    vectorizer: object
+    # Linear-classifier parameters for the fused predict path (None if the model has no coef_)
+    coef: Optional[np.ndarray]
+    intercept: Optional[np.ndarray]
+    # classes_ rendered as response strings once, indexed by predicted class index
+    labels: Optional[List[str]]
+    # Vectorizer pipeline pieces for the single-pass path (None unless it is a plain
+    # CountVectorizer, not a subclass such as TfidfVectorizer, with a unigram word analyzer,
+    # the built-in preprocessor/tokenizer and no stop words)
+    preprocess: Optional[Callable[[str], str]]
+    tokenize: Optional[Callable[[str], List[str]]]
+    vocabulary: Optional[Dict[str, int]]
+    # Whitespace runs can be collapsed before tokenizing only when the token pattern
+    # (the default one) never matches whitespace
+    collapse_whitespace: bool
+
+def _load_artifact(pickle_path: str, joblib_path: str) -> object:
+    """Load one artifact, memory-mapping its ndarrays from the joblib copy if it is up to date."""
+    if os.path.exists(joblib_path):
+        if not os.path.exists(pickle_path) or os.path.getmtime(joblib_path) >= os.path.getmtime(pickle_path):
+            import joblib
+            return joblib.load(joblib_path, mmap_mode="r")
+        logger.warning(
+            "Ignoring %s: older than %s (re-run convert_artifacts.py); loading the pickle instead.",
+            joblib_path, pickle_path,
+        )
+    import pickle
+    with open(pickle_path, "rb") as f:
+        return pickle.load(f)
+
+def _freeze(*arrays: Optional[np.ndarray]) -> None:
+    """Mark arrays read-only so no code path can write to them.
+
+    Pages are only shared when the weights come from the float32 .joblib copies (mapped
+    from the page cache) or from a preloaded master (the gunicorn.conf.py alternative,
+    where a write would CoW-copy them). Weights loaded from the .pkl files are
+    converted into per-process float32 copies, which this cannot make shared.
+    """
+    for arr in arrays:
+        if isinstance(arr, np.ndarray):
+            arr.flags.writeable = False
+
+@functools.cache
+def _artifacts() -> _Artifacts:
+    """Load model and vectorizer once per process (failures are not cached, so later calls retry)."""
+    logger.info("Loading artifacts...")
+    model = _load_artifact(MODEL_PATH, MODEL_JOBLIB_PATH)
+    vectorizer = _load_artifact(VECTORIZER_PATH, VECTORIZER_JOBLIB_PATH)
+    coef = intercept = labels = None
+    if hasattr(model, "coef_") and hasattr(model, "classes_"):
+        # FP32 halves memory traffic in the (memory-bound) sparse-dense matvec. No copy is
+        # made when the weights are already contiguous float32 (convert_artifacts.py output),
+        # so mmapped weights are read straight from the shared mapping.
+        coef = np.ascontiguousarray(model.coef_, dtype=np.float32)
+        # intercept_ is a scalar 0.0 when fit_intercept=False; give it one entry per coef_ row
+        intercept = np.ascontiguousarray(
+            np.broadcast_to(np.asarray(model.intercept_, dtype=np.float32), (coef.shape[0],))
+        )
+        labels = [str(c) for c in np.asarray(model.classes_).tolist()]
+        _freeze(coef, intercept)
+        # Emit float32 counts so the matvec needs no upcast
+        vectorizer.dtype = np.float32
+        if numba is not None:
+            # Compile (or load from the on-disk cache) before serving / forking
+            _linear_predict_kernel(
+                np.zeros(1, dtype=np.int32), np.zeros(0, dtype=np.int32),
+                np.zeros(0, dtype=np.float32), coef, intercept,
+            )
+    _freeze(
+        getattr(model, "coef_", None),
+        getattr(model, "intercept_", None),
+        getattr(model, "classes_", None),
+    )
+    from sklearn.feature_extraction.text import CountVectorizer
+    preprocess = tokenize = vocabulary = None
+    collapse_whitespace = False
+    if (
+        # Subclasses (e.g. TfidfVectorizer) reweight counts after transform
+        type(vectorizer) is CountVectorizer
+        and vectorizer.analyzer == "word"
+        and vectorizer.preprocessor is None
+        and vectorizer.tokenizer is None
+        and tuple(vectorizer.ngram_range) == (1, 1)
+        and vectorizer.get_stop_words() is None
+    ):
+        preprocess = vectorizer.build_preprocessor()
+        tokenize = vectorizer.build_tokenizer()
+        if _RE2_TOKEN_RE is not None and vectorizer.token_pattern == _DEFAULT_TOKEN_PATTERN:
+            # Linear-time DFA scan instead of Python's backtracking re
+            tokenize = _RE2_TOKEN_RE.findall
+        vocabulary = vectorizer.vocabulary_
+        collapse_whitespace = vectorizer.token_pattern == _DEFAULT_TOKEN_PATTERN
+    logger.info("Artifacts loaded.")
+    return _Artifacts(
+        model, vectorizer, coef, intercept, labels, preprocess, tokenize, vocabulary, collapse_whitespace,
+    )
+
+def _artifacts_loaded() -> bool:
+    return _artifacts.cache_info().currsize > 0
+
+def _linear_predict_kernel(indptr, indices, data, coef, intercept):
+    """Class index per CSR row for a linear model: argmax(x @ coef.T + intercept)."""
+    n_rows = indptr.shape[0] - 1
+    n_out = coef.shape[0]
+    out = np.empty(n_rows, dtype=np.intp)
+    scores = np.empty(n_out, dtype=np.float32)
+    for r in range(n_rows):
+        for c in range(n_out):
+            scores[c] = intercept[c]
+        for k in range(indptr[r], indptr[r + 1]):
+            idx = indices[k]
+            v = data[k]
+            for c in range(n_out):
+                scores[c] += coef[c, idx] * v
+        if n_out == 1:
+            # Binary models keep a single coef_ row; positive score means classes_[1]
+            out[r] = 1 if scores[0] > 0 else 0
+        else:
+            out[r] = scores.argmax()
+    return out
+
+if numba is not None:
+    _linear_predict_kernel = numba.njit(cache=True)(_linear_predict_kernel)
+
+# Micro-batching: predictions that arrive while another is in flight are queued and
+# coalesced into one transform/predict call; a lone prediction runs inline
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_WAIT_TIMEOUT_S = 5.0
+
+class _PendingPrediction:
+    __slots__ = ("message", "event", "label", "error")
+
+    def __init__(self, message: str):
+        self.message = message
+        self.event = threading.Event()
+        self.label: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+_batch_queue: "queue.Queue[_PendingPrediction]" = queue.Queue()
+_batch_worker_pid: Optional[int] = None
+_batch_worker_lock = threading.Lock()
+_inflight = 0
+_inflight_lock = threading.Lock()
+
+# Inference functions
+def _normalize(message: str) -> str:
+    """Run the vectorizer's preprocessor (lowercase/accents) once, collapsing whitespace if token-safe."""
+    art = _artifacts()
+    if art.preprocess is None:
+        return message
+    if art.collapse_whitespace:
+        message = " ".join(message.split())
+    return art.preprocess(message)
+
+@functools.lru_cache(maxsize=8192)
+def _vectorize(message: str):
+    """Tokenize one normalized message into a cached 1 x V CSR row."""
+    import scipy.sparse
+    art = _artifacts()
+    if art.tokenize is None:
+        X = art.vectorizer.transform([message])
+        X.indices = X.indices.astype(np.int32, copy=False)
+        X.indptr = X.indptr.astype(np.int32, copy=False)
+        return X
+    # Message is already preprocessed: count tokens in C, then look each distinct one up once.
+    # The row is built directly in CSR form (no COO conversion, dtype inference or index sort).
+    indices: List[int] = []
+    data: List[int] = []
+    for token, n in Counter(art.tokenize(message)).items():
+        j = art.vocabulary.get(token)
+        if j is not None:
+            indices.append(j)
+            data.append(n)
+    if art.vectorizer.binary:
+        data = [1] * len(data)
+    return scipy.sparse.csr_matrix(
+        (
+            np.asarray(data, dtype=art.vectorizer.dtype),
+            np.asarray(indices, dtype=np.int32),
+            np.array([0, len(indices)], dtype=np.int32),
+        ),
+        shape=(1, len(art.vocabulary)),
+    )
+
+def _predict_batch(messages: List[str]) -> List[str]:
+    """Run inference on a batch and return the predicted classes as string labels."""
+    import scipy.sparse
+    art = _artifacts()
+    X = scipy.sparse.vstack([_vectorize(_normalize(m)) for m in messages], format="csr")
+    if art.coef is not None and numba is not None:
+        idx = _linear_predict_kernel(X.indptr, X.indices, X.data, art.coef, art.intercept)
+    elif art.coef is not None:
+        # Fused linear decision function: one sparse-dense matvec, no sklearn validation
+        scores = X.dot(art.coef.T)
+        scores += art.intercept
+        if scores.shape[1] == 1:
+            # Binary models keep a single coef_ row; positive score means classes_[1]
+            idx = (scores[:, 0] > 0).astype(np.intp)
+        else:
+            idx = scores.argmax(axis=1)
+    else:
+        # tolist() converts numpy scalars to native values in one C pass
+        return [str(val) for val in art.model.predict(X).tolist()]
+    return [art.labels[i] for i in idx.tolist()]
+
+def _batch_worker() -> None:
+    """Predict whatever is already queued (up to BATCH_MAX_SIZE) in one call; never waits for more."""
+    while True:
+        batch = [_batch_queue.get()]
+        while len(batch) < BATCH_MAX_SIZE:
+            try:
+                batch.append(_batch_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            labels = _predict_batch([p.message for p in batch])
+            for pending, label in zip(batch, labels):
+                pending.label = label
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+        for pending in batch:
+            pending.event.set()
+
+def _ensure_batch_worker() -> None:
+    """Start the batch worker thread once per process (threads do not survive fork)."""
+    global _batch_worker_pid
+    pid = os.getpid()
+    if _batch_worker_pid == pid:
         return
-    with _artifact_lock:
-        if _loaded_model is None or _vectorizer is None:
-            import pickle
-            logger.info("Loading artifacts...")
-            with open(MODEL_PATH, "rb") as mf:
-                _loaded_model = pickle.load(mf)
-            with open(VECTORIZER_PATH, "rb") as vf:
-                _vectorizer = pickle.load(vf)
-            logger.info("Artifacts loaded.")
-
-# Inference function
+    with _batch_worker_lock:
+        if _batch_worker_pid != pid:
+            threading.Thread(target=_batch_worker, name="batch-predict", daemon=True).start()
+            _batch_worker_pid = pid
+
+def _predict_queued(message: str) -> str:
+    """Hand the message to the batch worker and wait for its label."""
+    _ensure_batch_worker()
+    pending = _PendingPrediction(message)
+    _batch_queue.put(pending)
+    if not pending.event.wait(BATCH_WAIT_TIMEOUT_S):
+        raise TimeoutError("Timed out waiting for batched prediction.")
+    if pending.error is not None:
+        raise pending.error
+    return pending.label
+
+@functools.lru_cache(maxsize=4096)
+def _predict_cached(message: str) -> str:
+    """Inference memoized on the raw message (exact repeats); artifacts are immutable once loaded.
+
+    Near-duplicates that only differ in case/whitespace miss here but hit the
+    _vectorize row cache, which is keyed on the normalized text.
+    """
+    global _inflight
+    with _inflight_lock:
+        _inflight += 1
+        alone = _inflight == 1
+    try:
+        if alone:
+            # Nothing to batch with (e.g. Gunicorn sync workers): skip the queue handoff
+            return _predict_batch([message])[0]
+        return _predict_queued(message)
+    finally:
+        with _inflight_lock:
+            _inflight -= 1
+
 def _predict_text(message: str) -> str:
     """Run inference and return the predicted class as a string label."""
-    _load_artifacts_once()
-    X = _vectorizer.transform([message])
-    pred = _loaded_model.predict(X)
-    # pred[0] could be a numpy scalar; normalize to native str
-    val = pred[0]
-    val_py = val.item() if hasattr(val, "item") else val
-    return str(val_py)
-
-# Eager load artifacts in a background thread at startup
-def _eager_load_background():
+    _artifacts()
+    return _predict_cached(message)
+
+# Eager load artifacts synchronously at import, so the first request never races a loader.
+# Granian (the Procfile default) imports the app in each worker, so every worker loads its own
+# copy; only with the gunicorn.conf.py alternative (preload_app) does this run once in the
+# master, leaving the artifacts in pre-fork pages shared via CoW.
+def _eager_load() -> None:
     try:
-        _load_artifacts_once()
+        _artifacts()
     except Exception as e:
         # Log and continue; app remains healthy and will lazy-load on first request
-        logger.warning("Background eager load failed: %s", e, exc_info=True)
+        logger.warning("Eager load failed: %s", e, exc_info=True)
 
 
-# Non-blocking eager load at startup
-threading.Thread(target=_eager_load_background, daemon=True).start()
+_eager_load()
 
 DEMO_HTML = """
 <!doctype html>
@@ -127,22 +402,40 @@ DEMO_HTML = """
 </html>
 """
 
-# Routes
-@application.get("/")
-def health():
-    return jsonify({
+# Compile the demo template once; the app's Jinja env keeps HTML autoescaping on
+_DEMO_TEMPLATE = application.jinja_env.from_string(DEMO_HTML)
+
+def _render_demo(**ctx) -> str:
+    return _DEMO_TEMPLATE.render(request=request, **ctx)
+
+# JSON responses serialized with orjson (cheaper than jsonify for these small payloads)
+def _json(obj: dict, status: int = 200) -> Response:
+    return _json_bytes(orjson.dumps(obj), status)
+
+def _json_bytes(body: bytes, status: int = 200) -> Response:
+    return application.response_class(body, status=status, mimetype="application/json")
+
+# Health-check bodies only depend on constants and the loaded flag; serialize both once
+_HEALTH_BODIES = {
+    loaded: orjson.dumps({
         "status": "ok",
-        "model_loaded": bool(_loaded_model is not None and _vectorizer is not None),
+        "model_loaded": loaded,
         "model_path": MODEL_PATH,
         "vectorizer_path": VECTORIZER_PATH,
-    }), 200
+    })
+    for loaded in (True, False)
+}
+
+# Routes
+@application.get("/")
+def health():
+    return _json_bytes(_HEALTH_BODIES[_artifacts_loaded()], 200)
 
 # Demo page rendering endpoint
 @application.get("/demo")
 def demo():
-    return render_template_string(
-        DEMO_HTML,
-        model_loaded=bool(_loaded_model is not None and _vectorizer is not None),
+    return _render_demo(
+        model_loaded=_artifacts_loaded(),
         model_path=MODEL_PATH,
         prediction=None,
         error=None,
@@ -153,25 +446,22 @@ def demo():
 def predict_form():
     message = (request.form.get("message") or "").strip()
     if not message:
-        return render_template_string(
-            DEMO_HTML,
-            model_loaded=bool(_loaded_model is not None and _vectorizer is not None),
+        return _render_demo(
+            model_loaded=_artifacts_loaded(),
             model_path=MODEL_PATH,
             prediction=None,
             error="Field 'message' is required and must be non-empty.",
         ), 400
     try:
         label = _predict_text(message)
-        return render_template_string(
-            DEMO_HTML,
+        return _render_demo(
             model_loaded=True,
             model_path=MODEL_PATH,
             prediction=label,
             error=None,
         )
     except FileNotFoundError:
-        return render_template_string(
-            DEMO_HTML,
+        return _render_demo(
             model_loaded=False,
             model_path=MODEL_PATH,
             prediction=None,
@@ -179,9 +469,8 @@ def predict_form():
         ), 503
     except Exception as e:
         logger.exception("Inference error: %s", e)
-        return render_template_string(
-            DEMO_HTML,
-            model_loaded=bool(_loaded_model is not None and _vectorizer is not None),
+        return _render_demo(
+            model_loaded=_artifacts_loaded(),
             model_path=MODEL_PATH,
             prediction=None,
             error="Inference failed.",
@@ -190,21 +479,26 @@ def predict_form():
 # JSON API endpoint for predictions
 @application.post("/predict")
 def predict_json():
-    data = request.get_json(silent=True) or {}
+    try:
+        data = orjson.loads(request.get_data()) if request.data else {}
+    except orjson.JSONDecodeError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
     message = str(data.get("message", "")).strip()
     if not message:
-        return jsonify({"error": "Field 'message' is required and must be non-empty."}), 400
+        return _json({"error": "Field 'message' is required and must be non-empty."}, 400)
     try:
         label = _predict_text(message)
-        return jsonify({"label": label}), 200
+        return _json({"label": label}, 200)
     except FileNotFoundError:
-        return jsonify({"error": "Model artifacts not found on server."}), 503
+        return _json({"error": "Model artifacts not found on server."}, 503)
     except Exception as e:
         logger.exception("Inference error: %s", e)
-        return jsonify({"error": "Inference failed."}), 500
+        return _json({"error": "Inference failed."}, 500)
 
 
 if __name__ == "__main__":
-    # Local dev run; in EB, Gunicorn (from Procfile) will host the app
+    # Local dev run; in EB, granian (from Procfile) will host the app
     port = int(os.getenv("PORT", "8000"))
     application.run(host="0.0.0.0", port=port, debug=False)
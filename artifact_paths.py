@@ -0,0 +1,14 @@
+"""Model artifact locations, shared by application.py and convert_artifacts.py.
+
+Kept separate so the conversion script can resolve paths without importing
+application (which loads the artifacts at import time).
+"""
+import os
+
+# Resolve artifact paths relative to this file; allow env overrides (empty env won't override)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.getenv("MODEL_PATH") or os.path.join(BASE_DIR, "basic_classifier.pkl")
+VECTORIZER_PATH = os.getenv("VECTORIZER_PATH") or os.path.join(BASE_DIR, "count_vectorizer.pkl")
+# joblib copies written by convert_artifacts.py; preferred when present and up to date (memory-mapped)
+MODEL_JOBLIB_PATH = os.path.splitext(MODEL_PATH)[0] + ".joblib"
+VECTORIZER_JOBLIB_PATH = os.path.splitext(VECTORIZER_PATH)[0] + ".joblib"
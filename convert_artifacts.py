@@ -0,0 +1,35 @@
+"""Convert the pickled artifacts to joblib format for memory-mapped loading.
+
+application.py loads the .joblib copies with mmap_mode="r" when they exist and
+are at least as new as the .pkl files, so the model's ndarrays are memory-mapped
+from disk (and shared through the page cache across server workers) instead of
+being copied into each process heap. Linear model weights are stored as
+contiguous float32, the layout the fused predict path reads, so they are used
+straight from the mapping. Re-run after replacing either .pkl file.
+
+Usage: python convert_artifacts.py
+"""
+import pickle
+
+import joblib
+import numpy as np
+
+from artifact_paths import MODEL_PATH, MODEL_JOBLIB_PATH, VECTORIZER_PATH, VECTORIZER_JOBLIB_PATH
+
+
+def convert(pickle_path: str, joblib_path: str) -> None:
+    with open(pickle_path, "rb") as f:
+        obj = pickle.load(f)
+    if hasattr(obj, "coef_"):
+        # Match the dtype/layout application.py computes with, so loading needs no copy
+        obj.coef_ = np.ascontiguousarray(obj.coef_, dtype=np.float32)
+        if isinstance(obj.intercept_, np.ndarray):
+            obj.intercept_ = np.ascontiguousarray(obj.intercept_, dtype=np.float32)
+    # compress=0 is required for mmap_mode loading
+    joblib.dump(obj, joblib_path, compress=0)
+    print(f"Wrote {joblib_path}")
+
+
+if __name__ == "__main__":
+    convert(MODEL_PATH, MODEL_JOBLIB_PATH)
+    convert(VECTORIZER_PATH, VECTORIZER_JOBLIB_PATH)
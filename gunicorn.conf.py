@@ -0,0 +1,21 @@
+# Gunicorn config (alternative to the granian Procfile entry):
+#   gunicorn -c gunicorn.conf.py application:application
+import multiprocessing
+import os
+
+bind = "0.0.0.0:" + os.getenv("PORT", "8000")
+
+# Import the app (and load model artifacts) once in the master before forking,
+# so workers share the unpickled artifacts via copy-on-write instead of each
+# loading its own copy.
+preload_app = True
+
+workers = int(os.getenv("WEB_CONCURRENCY") or min(multiprocessing.cpu_count() * 2 + 1, 4))
+worker_class = "sync"
+
+
+def when_ready(server):
+    # Runs in the master before workers are spawned; a no-op when preload_app already
+    # loaded the artifacts, otherwise it loads them here so forked workers inherit them.
+    from application import _eager_load
+    _eager_load()
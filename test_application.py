@@ -0,0 +1,139 @@
+"""In-process tests for application.py, run against the shipped artifacts.
+
+test_app.py exercises the deployed URL; these need no network or server.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import application as app_module
+
+MESSAGES = [
+    "Toronto's newest park is now open but don't get too attached to it",
+    "One of Matty Matheson’s Toronto restaurants closes less than a year after opening",
+    "Aliens have visited the world today",
+    "BREAKING: new disease wipes out half the world",
+]
+
+# Micro-batching
+def test_sequential_prediction_skips_batch_queue(monkeypatch):
+    # A lone prediction must run inline; reaching the queue would pay a thread handoff
+    def fail(message):
+        raise AssertionError("lone prediction went through the batch queue")
+    monkeypatch.setattr(app_module, "_predict_queued", fail)
+    message = MESSAGES[0]
+    assert app_module._predict_cached.__wrapped__(message) == app_module._predict_batch([message])[0]
+
+def test_concurrent_predictions_form_batches(monkeypatch):
+    messages = MESSAGES * 4
+    expected = [app_module._predict_batch([m])[0] for m in messages]
+    real_predict_batch = app_module._predict_batch
+    gate = threading.Event()
+    sizes = []
+
+    def gated_predict_batch(batch):
+        # Hold every batch until the remaining callers have queued up behind it
+        sizes.append(len(batch))
+        gate.wait(5)
+        return real_predict_batch(batch)
+
+    monkeypatch.setattr(app_module, "_predict_batch", gated_predict_batch)
+    with ThreadPoolExecutor(max_workers=len(messages)) as ex:
+        futures = [ex.submit(app_module._predict_cached.__wrapped__, m) for m in messages]
+        deadline = time.monotonic() + 5
+        while app_module._batch_queue.qsize() < len(messages) // 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        gate.set()
+        got = [f.result() for f in futures]
+    assert got == expected
+    assert max(sizes) > 1
+
+# Equivalence with CountVectorizer.transform + predict
+EQUIVALENCE_MESSAGES = [
+    "BREAKING: Celebrity FOUND alive after FAKE death hoax",
+    "  scientists \t confirm   new\nparticle  discovered  ",
+    "hoax hoax hoax HOAX Hoax alive alive",
+    "completely unrelated words xyzzy quux",
+    "",
+    "a b c",
+    "Café naïve résumé: Matty Matheson’s Toronto restaurant",
+    "東京 новости ١٢٣ Ⅻ fake_news hoax_ cure",
+    "éhoax fakeé ALIVEñ 東京cure cure²",
+    "local man claims cure for common cold with home remedy",
+    "government releases annual economic report; not verified!!!",
+]
+
+def _reference_artifacts():
+    import pickle
+    with open(app_module.MODEL_PATH, "rb") as f:
+        model = pickle.load(f)
+    with open(app_module.VECTORIZER_PATH, "rb") as f:
+        vectorizer = pickle.load(f)
+    return model, vectorizer
+
+def _random_messages(vocabulary, n=500, seed=0):
+    import random
+    rng = random.Random(seed)
+    words = list(vocabulary) + ["oov", "Zürich", "naïve", "東京", "x", "_", "42", "a1"]
+    # Includes separators that are word characters outside ASCII, so tokens get glued to them
+    seps = [" ", "  ", "\t", "\n", ", ", "-", "'", "’", "!", "é", "東", "²"]
+    messages = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(0, 12)):
+            word = rng.choice(words)
+            parts.append(word.upper() if rng.random() < 0.2 else word)
+            parts.append(rng.choice(seps))
+        messages.append("".join(parts))
+    return messages
+
+def test_local_predict_matches_sklearn():
+    # The hand-built preprocess/tokenize/CSR path must agree with CountVectorizer.transform + predict
+    model, vectorizer = _reference_artifacts()
+    messages = EQUIVALENCE_MESSAGES + _random_messages(vectorizer.vocabulary_)
+    for message in messages:
+        expected = str(model.predict(vectorizer.transform([message]))[0])
+        assert app_module._predict_text(message) == expected, message
+        row = app_module._vectorize(app_module._normalize(message))
+        assert (row != vectorizer.transform([message])).nnz == 0, message
+
+def test_local_predict_endpoint_matches_sklearn():
+    model, vectorizer = _reference_artifacts()
+    client = app_module.application.test_client()
+    for message in EQUIVALENCE_MESSAGES:
+        response = client.post("/predict", json={"message": message})
+        if not message.strip():
+            assert response.status_code == 400
+            continue
+        expected = str(model.predict(vectorizer.transform([message.strip()]))[0])
+        assert response.status_code == 200
+        assert response.get_json()["label"] == expected, message
+
+def test_custom_token_pattern_keeps_whitespace(monkeypatch, tmp_path):
+    # A pattern that can match whitespace must see the message's original spacing
+    import pickle
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    vectorizer = CountVectorizer(token_pattern=r"[^,]+")
+    X = vectorizer.fit_transform(["new  york, city", "new york, town"])
+    model = LogisticRegression().fit(X, ["A", "B"])
+    model_path, vectorizer_path = tmp_path / "model.pkl", tmp_path / "vectorizer.pkl"
+    model_path.write_bytes(pickle.dumps(model))
+    vectorizer_path.write_bytes(pickle.dumps(vectorizer))
+
+    monkeypatch.setattr(app_module, "MODEL_PATH", str(model_path))
+    monkeypatch.setattr(app_module, "VECTORIZER_PATH", str(vectorizer_path))
+    monkeypatch.setattr(app_module, "MODEL_JOBLIB_PATH", str(tmp_path / "model.joblib"))
+    monkeypatch.setattr(app_module, "VECTORIZER_JOBLIB_PATH", str(tmp_path / "vectorizer.joblib"))
+    caches = (app_module._artifacts, app_module._vectorize, app_module._predict_cached)
+    for cache in caches:
+        cache.cache_clear()
+    try:
+        for message in ["new  york", "new york", "New  York, town"]:
+            expected = str(model.predict(vectorizer.transform([message]))[0])
+            assert app_module._predict_text(message) == expected, message
+    finally:
+        # Drop the custom artifacts so later tests reload the shipped ones
+        for cache in caches:
+            cache.cache_clear()